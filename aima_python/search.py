@@ -4,7 +4,7 @@ import functools
 
 # ______________________________________________________________________________
 # Uninformed Search algorithms
-def best_first_graph_search(problem, f):
+def best_first_graph_search(problem, f, closed=None):
     """Search the nodes with the lowest f scores first.
     You specify the function f(node) that you want to minimize; for example,
     if f is a heuristic estimate to the goal, then we have greedy best
@@ -18,37 +18,201 @@ def best_first_graph_search(problem, f):
     Duplicate states are allowed in the heap to avoid deleting from heap.
     Referenced from <https://www.redblobgames.com/pathfinding/a-star/
     implementation.html#python-astar>
+
+    The explored states are kept in a closed list, by default a
+    NodeClosedList. Pass another implementation of the same methods as
+    closed to store them differently.
     """
     f = memoize(f, 'f')
     node = Node(problem.initial)
     frontier = PriorityQueue('min', f)
     frontier.append(node)
-    explored = {}
+    explored = NodeClosedList() if closed is None else closed
+    explored.add(node)
 
     while frontier:
         node = frontier.pop()
         if problem.goal_test(node.state):
-            return node
-        explored[node.state] = node
+            return explored.goal_node(problem, node)
+        # Skip duplicates superseded by a cheaper path to the same state
+        if node.path_cost > explored.path_cost(node.state):
+            continue
         for child in node.expand(problem):
-            if ( child.state not in explored or
-                    child.path_cost < explored[child.state].path_cost ):
+            best_cost = explored.path_cost(child.state)
+            if best_cost is None or child.path_cost < best_cost:
                 frontier.append(child)
-                explored[child.state] = child
+                explored.add(child)
     return None
 
+class NodeClosedList:
+    """The default closed list of best_first_graph_search: a dict mapping
+    every state reached so far to the cheapest node reaching it."""
+
+    def __init__(self):
+        self.nodes = {}
+
+    def path_cost(self, state):
+        """Cost of the cheapest path found to state, or None if the state
+        has not been reached."""
+        node = self.nodes.get(state)
+        return None if node is None else node.path_cost
+
+    def add(self, node):
+        """Record node as the cheapest path found to its state."""
+        self.nodes[node.state] = node
+
+    def goal_node(self, problem, node):
+        """Return the goal node with its full path to the initial state."""
+        return node
+
 def uniform_cost_search(problem):
     """[Figure 3.14]"""
     return best_first_graph_search(problem, lambda node: node.path_cost)
 
 # ______________________________________________________________________________
 # Informed (Heuristic) Search
-def astar_search(problem, h=None):
+def astar_search(problem, h=None, closed=None):
     """A* search is best-first graph search with f(n) = g(n)+h(n).
     You need to specify the h function when you call astar_search, or
     else in your Problem subclass."""
     h = memoize(h or problem.h, 'h')
-    return best_first_graph_search(problem, lambda n: n.path_cost + h(n))
+    return best_first_graph_search(problem, lambda n: n.path_cost + h(n),
+                                   closed)
+
+def partial_expansion_astar_search(problem, closed=None):
+    """Enhanced partial expansion A* (EPEA*). Every node in the frontier has
+    a stored value F, initially its f. Expanding a node only generates the
+    children whose f equals F, and puts the node back with F raised to the
+    smallest larger f among the other children, if there is one. Children
+    with a larger f are only generated if the search gets that far.
+
+    Rather than building every child to find its f, the problem lists its
+    actions with the increase in f each one causes, through a method
+    delta_f_actions(state) returning (delta_f, action) pairs. The heuristic
+    problem.h must be consistent, so that no delta_f is negative.
+    The closed list is the same as in best_first_graph_search."""
+    h = memoize(problem.h, 'h')
+    node = Node(problem.initial)
+    node.F = h(node)
+    frontier = PriorityQueue('min', lambda n: n.F)
+    frontier.append(node)
+    explored = NodeClosedList() if closed is None else closed
+    explored.add(node)
+
+    while frontier:
+        node = frontier.pop()
+        if problem.goal_test(node.state):
+            return explored.goal_node(problem, node)
+        # Skip duplicates superseded by a cheaper path to the same state
+        if node.path_cost > explored.path_cost(node.state):
+            continue
+
+        f = node.path_cost + h(node)
+        next_F = None
+        for delta_f, action in problem.delta_f_actions(node.state):
+            if f + delta_f > node.F:
+                if next_F is None or f + delta_f < next_F:
+                    next_F = f + delta_f
+            elif f + delta_f == node.F:
+                child = node.child_node(problem, action)
+                best_cost = explored.path_cost(child.state)
+                if best_cost is None or child.path_cost < best_cost:
+                    child.h = node.F - child.path_cost
+                    child.F = node.F
+                    frontier.append(child)
+                    explored.add(child)
+
+        if next_F is not None:
+            node.F = next_F
+            frontier.append(node)
+    return None
+
+def bidirectional_astar_search(problem, reverse_problem, h=None,
+                               reverse_h=None):
+    """Bidirectional A* search. The forward search runs from problem.initial
+    and the backward search from reverse_problem.initial, which must be the
+    goal state of problem, with the actions of reverse_problem being the
+    inverses of the actions of problem. Each direction is an A* search
+    towards the start of the other one (front-to-end).
+
+    The direction with the smaller frontier is expanded next. Whenever a
+    state generated in one direction has already been reached by the other,
+    the path through it becomes a candidate solution. The search stops once
+    the cheapest candidate costs no more than the smallest f value left in
+    either frontier, which proves it optimal if both heuristics are
+    admissible."""
+    if problem.goal_test(problem.initial):
+        return Node(problem.initial)
+
+    forward = _SearchDirection(problem, h or problem.h)
+    backward = _SearchDirection(reverse_problem, reverse_h or reverse_problem.h)
+
+    best_cost, meeting = float('inf'), None
+    while forward.frontier and backward.frontier:
+        if best_cost <= max(forward.min_f(), backward.min_f()):
+            break
+
+        if len(forward.frontier) <= len(backward.frontier):
+            this, other = forward, backward
+        else:
+            this, other = backward, forward
+
+        node = this.frontier.pop()
+        # Skip duplicates superseded by a cheaper path to the same state
+        if node.path_cost > this.explored[node.state].path_cost:
+            continue
+
+        for child in node.expand(this.problem):
+            if ( child.state not in this.explored or
+                    child.path_cost < this.explored[child.state].path_cost ):
+                this.frontier.append(child)
+                this.explored[child.state] = child
+
+                if child.state in other.explored:
+                    other_node = other.explored[child.state]
+                    cost = child.path_cost + other_node.path_cost
+                    if cost < best_cost:
+                        best_cost = cost
+                        meeting = ((child, other_node) if this is forward
+                                        else (other_node, child))
+
+    if meeting is None:
+        return None
+    return _join_paths(problem, *meeting)
+
+class _SearchDirection:
+    """The frontier and the explored states of one direction of a
+    bidirectional search. As in best_first_graph_search, explored maps every
+    state reached so far to the cheapest node reaching it."""
+
+    def __init__(self, problem, h):
+        h = memoize(h, 'h')
+        self.problem = problem
+        self.frontier = PriorityQueue('min', memoize(
+                                lambda n: n.path_cost + h(n), 'f'))
+        node = Node(problem.initial)
+        self.frontier.append(node)
+        self.explored = {node.state: node}
+
+    def min_f(self):
+        """Smallest f value in the frontier. Superseded duplicates are not
+        removed from the heap, so this is a lower bound."""
+        return self.frontier.heap[0][0]
+
+def _join_paths(problem, forward_node, backward_node):
+    """Extend forward_node along the path of backward_node back to the goal,
+    replaying each backward step with the forward action that undoes it."""
+    states = [node.state for node in reversed(backward_node.path()[:-1])]
+    return follow_states(problem, forward_node, states)
+
+def follow_states(problem, node, states):
+    """Extend node through each of the states in turn, taking the action of
+    problem that leads from one to the next."""
+    for next_state in states:
+        action = next(action for action in problem.actions(node.state)
+                        if problem.result(node.state, action) == next_state)
+        node = node.child_node(problem, action)
+    return node
 
 # ______________________________________________________________________________
 
@@ -6,15 +6,18 @@ from utils import (
 
 # ______________________________________________________________________________
 
-def get_approx_path_costs(exit_cells, blocks):
+def get_approx_path_costs(exit_cells, blocks, verbose=True):
 
+    # Start afresh so that costs from a previous board are not kept
     ApproxPathCosts.blocks = blocks
+    ApproxPathCosts.path_costs = {}
 
     for cell in exit_cells:
         ApproxPathCosts.path_costs[cell] = 0
         uniform_cost_search(ApproxPathCosts(cell))
 
-    print_board(ApproxPathCosts.path_costs)
+    if verbose:
+        print_board(ApproxPathCosts.path_costs)
 
     return ApproxPathCosts.path_costs
 
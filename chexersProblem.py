@@ -1,8 +1,9 @@
 from aima_python.problem import Problem
 from approxPathCosts import get_approx_path_costs
 from utils import (
-    COLOUR, PIECES, BLOCKS, MOVE, JUMP, EXIT, ALL_CELLS,
-    moveable_cells, jumpable_cells, print_board
+    COLOUR, PIECES, BLOCKS, MOVE, JUMP, EXIT, ENTER, ALL_CELLS,
+    MOVE_DELTA, JUMP_DELTA, moveable_cells, jumpable_cells, generate_cells,
+    print_board
 )
 
 # ______________________________________________________________________________
@@ -13,31 +14,144 @@ EXIT_CELLS = {
     "green": [(-3, 3), (-2, 3), (-1, 3), (0, 3)]
 }
 
+# The reflection of the board which maps the exit cells of each colour onto
+# themselves
+MIRRORS = {
+    "red": lambda q, r: (q, -q - r),
+    "blue": lambda q, r: (r, q),
+    "green": lambda q, r: (-q - r, r)
+}
+
 # ______________________________________________________________________________
 
-class ChexersProblem(Problem):
+class ChexersBoardProblem(Problem):
     """
-    ChexersProblem class for the project. Inherits from Problem.
-    Methods were implemented by formulating the chexers problem.
+    The board shared by the chexers problem and its reverse: the blocks, the
+    exit cells, the approximate path costs and the symmetry of the board,
+    along with the moves and jumps of the pieces. Inherits from Problem.
+    Subclasses choose the initial and goal states in endpoints.
     """
-    def __init__(self, data):
+    def __init__(self, data, verbose=True):
         # The coordinates of the blocks
         self.blocks = [tuple(block) for block in data[BLOCKS]]
 
         # Setup the exit cells for a given colour with blocked cells removed
         self.exit_cells = set(EXIT_CELLS[data[COLOUR]]) - set(self.blocks)
 
-        # Our state is a tuple containing the current cells of the pieces
-        # Setup the initial state.
-        initial_state = tuple(sorted([tuple(cell) for cell in data[PIECES]]))
+        # If the blocks and exit cells are unchanged by the reflection of the
+        # board, a state and its mirror image are equally far from the goal.
+        # Only the smaller of the two is then searched (see canonical).
+        mirror = MIRRORS[data[COLOUR]]
+        self.mirror_dict = {cell: mirror(*cell) for cell in ALL_CELLS}
+        self.symmetric = (
+            set(self.mirror_cells(self.blocks)) == set(self.blocks) and
+            set(self.mirror_cells(self.exit_cells)) == self.exit_cells )
+
+        # Our state is a tuple containing the current cells of the pieces.
+        # Remember whether the input pieces had to be reflected so that the
+        # solution can be mapped back to the input board.
+        input_state = tuple(sorted([tuple(cell) for cell in data[PIECES]]))
+        self.input_pieces = self.canonical(input_state)
+        self.initial_mirrored = self.input_pieces != input_state
+
+        self.distance_dict = get_approx_path_costs(self.exit_cells, self.blocks,
+                                                   verbose)
+
+        super().__init__(*self.endpoints())
+
+    def endpoints(self):
+        """
+        Return the initial and goal states
+        """
+        raise NotImplementedError
+
+    def cell_actions(self, curr_cell, occupied):
+        """
+        Possible move and jump actions of the piece on curr_cell.
+        """
+        possible_actions = []
+
+        # Move actions
+        for next_cell in moveable_cells(curr_cell, occupied):
+            possible_actions += [(MOVE, curr_cell, next_cell)]
+
+        # Jump actions
+        for next_cell in jumpable_cells(curr_cell, occupied):
+            possible_actions += [(JUMP, curr_cell, next_cell)]
+
+        return possible_actions
+
+    def result(self, state, action):
+        """
+        Update the new state by the action, keeping it canonical
+        """
+        return self.canonical(self.apply(state, action))
+
+    def apply(self, state, action):
+        """
+        Update the new state by a move or jump action
+        """
+        pieces = list(state)
+
+        # Update the current position of the piece
+        curr_cell, next_cell = action[1], action[2]
+        pieces.remove(curr_cell)
+        pieces.append(next_cell)
+
+        return tuple(sorted(pieces))
+
+    def mirror_cells(self, cells):
+        return [self.mirror_dict[cell] for cell in cells]
+
+    def canonical(self, state):
+        """
+        Return the smaller of the state and its mirror image if the board is
+        symmetric, so both are stored and expanded only once
+        """
+        if not self.symmetric:
+            return state
+        return min(state, tuple(sorted(self.mirror_cells(state))))
+
 
+class ChexersProblem(ChexersBoardProblem):
+    """
+    ChexersProblem class for the project. Inherits from ChexersBoardProblem.
+    Methods were implemented by formulating the chexers problem.
+    """
+    def __init__(self, data, verbose=True):
+        super().__init__(data, verbose)
+
+        # Only partial expansion search needs the operator table, so it is
+        # built by the first call to delta_f_actions
+        self.operator_table = None
+
+    def endpoints(self):
         # Setup the goal state. The goal state is to move all pieces
         # off the board.
-        goal_state = tuple()
-
-        self.distance_dict = get_approx_path_costs(self.exit_cells, self.blocks)
+        return self.input_pieces, tuple()
 
-        super().__init__(initial_state, goal_state)
+    def build_operator_table(self):
+        """
+        For each cell, list the moves and jumps out of it that stay on cells
+        with an approximate path cost, as (change in heuristic, operator,
+        next cell, pivot cell) tuples. The pivot of a move is None.
+        """
+        distances = self.distance_dict
+        operator_table = {}
+        for curr_cell in distances:
+            operators = []
+            for next_cell in generate_cells(curr_cell, MOVE_DELTA):
+                if next_cell in distances:
+                    operators += [(distances[next_cell] -
+                                    distances[curr_cell], MOVE, next_cell, None)]
+            for (next_cell, middle_cell) in zip(
+                    generate_cells(curr_cell, JUMP_DELTA),
+                    generate_cells(curr_cell, MOVE_DELTA)):
+                if next_cell in distances and middle_cell in ALL_CELLS:
+                    operators += [(distances[next_cell] - distances[curr_cell],
+                                    JUMP, next_cell, middle_cell)]
+            operator_table[curr_cell] = operators
+        return operator_table
 
     def actions(self, state):
         """
@@ -48,13 +162,8 @@ class ChexersProblem(Problem):
 
         for curr_cell in state:
 
-            # Move actions
-            for next_cell in moveable_cells(curr_cell, occupied):
-                possible_actions += [(MOVE, curr_cell, next_cell)]
-
-            # Jump actions
-            for next_cell in jumpable_cells(curr_cell, occupied):
-                possible_actions += [(JUMP, curr_cell, next_cell)]
+            # Move and jump actions
+            possible_actions += self.cell_actions(curr_cell, occupied)
 
             # Exit actions
             if curr_cell in self.exit_cells:
@@ -62,26 +171,46 @@ class ChexersProblem(Problem):
 
         return possible_actions
 
-    def result(self, state, action):
+    def delta_f_actions(self, state):
         """
-        Update the new state by the action
+        Possible actions, each paired with how much it increases f, i.e.
+        the step cost plus the change in h. Looked up from the operator table,
+        so no successor state needs to be built.
         """
-        pieces = list(state)
-        operator = action[0]
+        if self.operator_table is None:
+            self.operator_table = self.build_operator_table()
 
-        # Exit action will move one piece out from the state and turn the exit 
-        # cell empty again
-        if operator == EXIT:
-            curr_cell = action[1]
-            pieces.remove(curr_cell)
+        occupied = set(state) | set(self.blocks)
+        possible_actions = []
 
-        # Update the current position of the piece
-        if operator == MOVE or operator == JUMP:
-            curr_cell, next_cell = action[1], action[2]
-            pieces.remove(curr_cell)
-            pieces.append(next_cell)
+        for curr_cell in state:
 
-        return tuple(sorted(pieces))
+            # Move and jump actions
+            for delta_h, operator, next_cell, middle_cell in \
+                                        self.operator_table[curr_cell]:
+                if next_cell in occupied:
+                    continue
+                if middle_cell is None or middle_cell in occupied:
+                    possible_actions += [(1 + delta_h,
+                                            (operator, curr_cell, next_cell))]
+
+            # Exit actions remove the piece's 1 + 0 from the heuristic
+            if curr_cell in self.exit_cells:
+                possible_actions += [(0, (EXIT, curr_cell))]
+
+        return possible_actions
+
+    def apply(self, state, action):
+        """
+        Update the new state by the action
+        """
+        # Exit action will move one piece out from the state and turn the exit
+        # cell empty again
+        if action[0] == EXIT:
+            pieces = list(state)
+            pieces.remove(action[1])
+            return tuple(pieces)
+        return super().apply(state, action)
 
     def h(self, node):
         piece_cells = node.state
@@ -95,6 +224,118 @@ class ChexersProblem(Problem):
         # approximate path cost did not count the exit action.
         return sum([1 + self.distance_dict[cell] for cell in piece_cells])
 
+    def solution(self, node):
+        """
+        Return the actions taken to reach the node on the input board.
+        Whenever result reflected a state, the following actions were taken on
+        the mirror image and have to be reflected back.
+        """
+        mirrored = self.initial_mirrored
+        actions = []
+        for child in node.path()[1:]:
+            action = child.action
+            if mirrored:
+                action = (action[0],) + tuple(self.mirror_cells(action[1:]))
+            actions.append(action)
+
+            if child.state != self.apply(child.parent.state, child.action):
+                mirrored = not mirrored
+        return actions
+
+
+class ReverseChexersProblem(ChexersBoardProblem):
+    """
+    The chexers problem searched backwards, from the empty goal state to the
+    initial state of the ChexersProblem on the same board. Inherits from
+    ChexersBoardProblem.
+    The operators are the inverses of the forward ones: a piece enters the
+    board at an exit cell (the inverse of exit), and un-moves and un-jumps
+    are ordinary moves and jumps since the pivot of a jump is neither of its
+    endpoints. Pieces only enter while there are fewer than in the initial
+    state.
+    """
+    def __init__(self, data, verbose=True):
+        super().__init__(data, verbose)
+        self.n_pieces = len(self.input_pieces)
+
+        # The approximate path cost from each initial piece to every cell it
+        # can reach, and the cost for it to exit instead
+        self.piece_distances = [
+            get_approx_path_costs([piece], self.blocks, verbose=False)
+            for piece in self.input_pieces
+        ]
+        exit_costs = [1 + self.distance_dict[piece]
+                            for piece in self.input_pieces]
+
+        # The total exit cost of the initial pieces missing from each set of
+        # pieces, given as a bit mask
+        self.exit_costs = [
+            sum([cost for i, cost in enumerate(exit_costs) if not used >> i & 1])
+            for used in range(1 << self.n_pieces)
+        ]
+
+    def endpoints(self):
+        return tuple(), self.input_pieces
+
+    def actions(self, state):
+        """
+        Possible actions include un-move, un-jump and enter.
+        """
+        occupied = list(state) + self.blocks
+        possible_actions = []
+
+        # Un-move and un-jump actions
+        for curr_cell in state:
+            possible_actions += self.cell_actions(curr_cell, occupied)
+
+        # Enter actions
+        if len(state) < self.n_pieces:
+            for curr_cell in self.exit_cells:
+                if curr_cell not in state:
+                    possible_actions += [(ENTER, curr_cell)]
+
+        return possible_actions
+
+    def apply(self, state, action):
+        """
+        Update the new state by the action
+        """
+        if action[0] == ENTER:
+            return tuple(sorted(list(state) + [action[1]]))
+        return super().apply(state, action)
+
+    def h(self, node):
+        # States are canonical, so the pieces may equally have reached the
+        # mirror image of this state
+        cost = self.assignment_cost(node.state)
+        if self.symmetric:
+            cost = min(cost, self.assignment_cost(self.mirror_cells(node.state)))
+        return cost
+
+    def assignment_cost(self, piece_cells):
+        """
+        Every action moves a single piece, and each initial piece either ends
+        up on a distinct cell of piece_cells or exits. Return the least total
+        approximate path cost over all such assignments, or infinity if there
+        is none.
+        """
+        # key: bit mask of the initial pieces assigned so far, value: the
+        # least path cost of the assignment
+        costs = {0: 0}
+        for cell in piece_cells:
+            next_costs = {}
+            for used, cost in costs.items():
+                for i, distances in enumerate(self.piece_distances):
+                    if used >> i & 1 or cell not in distances:
+                        continue
+                    next_used, next_cost = used | 1 << i, cost + distances[cell]
+                    if next_cost < next_costs.get(next_used, float('inf')):
+                        next_costs[next_used] = next_cost
+            costs = next_costs
+
+        return min([cost + self.exit_costs[used]
+                        for used, cost in costs.items()], default=float('inf'))
+
 
 def print_initial_state(data):
 
@@ -0,0 +1,194 @@
+"""
+Packed binary corpora of boards, and of the plans solving them.
+
+A corpus file starts with CORPUS_MAGIC, followed by one record per board:
+
+    colour, number of pieces, number of blocks, piece cells..., block cells...
+
+one byte each, where a cell is its index in ALL_CELLS and a colour its index
+in COLOURS. A plans file starts with PLANS_MAGIC, followed by one record per
+board of the corpus, in the same order:
+
+    number of actions (2 bytes, little endian), then per action:
+    operator, current cell, next cell (one byte each)
+
+where an operator is its index in OPERATORS, the next cell of an exit is
+NO_CELL, and an unsolvable board has UNSOLVABLE actions.
+
+Usage:
+    python corpus.py pack <corpus> <input.json>...
+    python corpus.py solve <corpus> <plans>
+"""
+
+import sys
+import json
+import mmap
+import struct
+
+from aima_python.search import astar_search
+from chexersProblem import ChexersProblem
+from utils import (
+    COLOUR, PIECES, BLOCKS, MOVE, JUMP, EXIT, ALL_CELLS, CELL_INDEX
+)
+
+# ______________________________________________________________________________
+
+CORPUS_MAGIC = b"CHXB\x01"
+PLANS_MAGIC = b"CHXP\x01"
+
+COLOURS = ["red", "green", "blue"]
+OPERATORS = [MOVE, JUMP, EXIT]
+
+NO_CELL = 0xFF
+UNSOLVABLE = 0xFFFF
+
+ACTION_COUNT = struct.Struct("<H")
+
+
+def pack_board(data):
+    """
+    Pack a board, in the same form as the JSON inputs, into a record
+    """
+    pieces = [CELL_INDEX[tuple(cell)] for cell in data[PIECES]]
+    blocks = [CELL_INDEX[tuple(cell)] for cell in data[BLOCKS]]
+    return bytes([COLOURS.index(data[COLOUR]), len(pieces), len(blocks)] +
+                 pieces + blocks)
+
+
+def pack_plan(actions):
+    """
+    Pack the actions solving a board into a record, or mark the board
+    unsolvable if actions is None
+    """
+    if actions is None:
+        return ACTION_COUNT.pack(UNSOLVABLE)
+
+    record = bytearray(ACTION_COUNT.pack(len(actions)))
+    for action in actions:
+        next_cell = CELL_INDEX[action[2]] if len(action) > 2 else NO_CELL
+        record += bytes([OPERATORS.index(action[0]), CELL_INDEX[action[1]],
+                         next_cell])
+    return bytes(record)
+
+
+def map_file(path, magic):
+    """
+    Memory-map a corpus or plans file, checking that it starts with magic
+    """
+    with open(path, "rb") as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    if data[:len(magic)] != magic:
+        data.close()
+        raise ValueError("{} is not a file of the expected kind".format(path))
+    return data
+
+
+def check_record(data, path, offset, size):
+    """
+    Raise ValueError if the file is cut off before the size bytes at offset
+    """
+    if offset + size > len(data):
+        raise ValueError("{} is truncated: record at offset {} needs {} "
+                         "bytes".format(path, offset, size))
+
+
+def read_corpus(path):
+    """
+    Yield the boards of a corpus one at a time, in the same form as the JSON
+    inputs, reading the records straight from the memory-mapped file
+    """
+    data = map_file(path, CORPUS_MAGIC)
+    try:
+        offset = len(CORPUS_MAGIC)
+        while offset < len(data):
+            check_record(data, path, offset, 3)
+            colour, n_pieces, n_blocks = data[offset:offset + 3]
+            offset += 3
+            check_record(data, path, offset, n_pieces + n_blocks)
+            cells = [list(ALL_CELLS[index])
+                        for index in data[offset:offset + n_pieces + n_blocks]]
+            offset += n_pieces + n_blocks
+            yield {
+                COLOUR: COLOURS[colour],
+                PIECES: cells[:n_pieces],
+                BLOCKS: cells[n_pieces:]
+            }
+    finally:
+        data.close()
+
+
+def read_plans(path):
+    """
+    Yield the actions solving each board of a corpus (None if unsolvable)
+    from a memory-mapped plans file
+    """
+    data = map_file(path, PLANS_MAGIC)
+    try:
+        offset = len(PLANS_MAGIC)
+        while offset < len(data):
+            check_record(data, path, offset, ACTION_COUNT.size)
+            n_actions, = ACTION_COUNT.unpack_from(data, offset)
+            offset += ACTION_COUNT.size
+            if n_actions == UNSOLVABLE:
+                yield None
+                continue
+
+            actions = []
+            for _ in range(n_actions):
+                check_record(data, path, offset, 3)
+                operator, curr_cell, next_cell = data[offset:offset + 3]
+                offset += 3
+                action = (OPERATORS[operator], ALL_CELLS[curr_cell])
+                if next_cell != NO_CELL:
+                    action += (ALL_CELLS[next_cell],)
+                actions.append(action)
+            yield actions
+    finally:
+        data.close()
+
+# ______________________________________________________________________________
+
+def pack(corpus_path, input_paths):
+    """
+    Convert JSON input files into a corpus
+    """
+    with open(corpus_path, "wb") as corpus:
+        corpus.write(CORPUS_MAGIC)
+        for input_path in input_paths:
+            with open(input_path) as file:
+                corpus.write(pack_board(json.load(file)))
+
+
+def solve(corpus_path, plans_path):
+    """
+    Solve every board of a corpus, streaming the plans to a plans file
+    """
+    with open(plans_path, "wb") as plans:
+        plans.write(PLANS_MAGIC)
+        for data in read_corpus(corpus_path):
+            problem = ChexersProblem(data, verbose=False)
+
+            # A piece with no path to an exit cell has no approximate path
+            # cost, and the board cannot be solved
+            if any(piece not in problem.distance_dict
+                        for piece in problem.initial):
+                goal_node = None
+            else:
+                goal_node = astar_search(problem)
+
+            actions = problem.solution(goal_node) if goal_node else None
+            plans.write(pack_plan(actions))
+
+
+def main():
+    if len(sys.argv) >= 3 and sys.argv[1] == "pack":
+        pack(sys.argv[2], sys.argv[3:])
+    elif len(sys.argv) == 4 and sys.argv[1] == "solve":
+        solve(sys.argv[2], sys.argv[3])
+    else:
+        sys.exit("usage: corpus.py pack <corpus> <input.json>...\n"
+                 "       corpus.py solve <corpus> <plans>")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,71 +3,51 @@ import time
 import json
 import sys
 
+from chexersProblem import EXIT_CELLS
+from utils import (
+    COLOUR, PIECES, BLOCKS, MOVE, JUMP, EXIT, ALL_CELLS,
+    moveable_cells, jumpable_cells
+)
+
 SPEED = 1.5  # number of seconds per frame
 DEBUG = False  # for a larger board drawing that includes the coordinates inside each hex
 
-def print_board(board_dict, message="", **kwargs):
-    """
-    Helper function to print a drawing of a hexagonal board's contents.
-
-    Arguments:
-
-    * `board_dict` -- dictionary with tuples for keys and anything printable
-    for values. The tuple keys are interpreted as hexagonal coordinates (using 
-    the axial coordinate system outlined in the project specification) and the 
-    values are formatted as strings and placed in the drawing at the corres- 
-    ponding location (only the first 5 characters of each string are used, to 
-    keep the drawings small). Coordinates with missing values are left blank.
-
-    Keyword arguments:
-
-    * `message` -- an optional message to include on the first line of the 
-    drawing (above the board) -- default `""` (resulting in a blank message).
-    * `debug` -- for a larger board drawing that includes the coordinates 
-    inside each hex, set this to `True` -- default `False`.
-    * Or, any other keyword arguments! They will be forwarded to `print()`.
-    """
-
-    # Set up the board template:
-    if not DEBUG:
-        # Use the normal board template (smaller, not showing coordinates)
-        # 16
-        template = """# {0}
+# Use the normal board template (smaller, not showing coordinates)
+NORMAL_TEMPLATE = """# {0}
 #           .-'-._.-'-._.-'-._.-'-.
-#          |{16:}|{23:}|{29:}|{34:}| 
+#          |{16:}|{23:}|{29:}|{34:}|
 #        .-'-._.-'-._.-'-._.-'-._.-'-.
-#       |{10:}|{17:}|{24:}|{30:}|{35:}| 
+#       |{10:}|{17:}|{24:}|{30:}|{35:}|
 #     .-'-._.-'-._.-'-._.-'-._.-'-._.-'-.
-#    |{05:}|{11:}|{18:}|{25:}|{31:}|{36:}| 
+#    |{05:}|{11:}|{18:}|{25:}|{31:}|{36:}|
 #  .-'-._.-'-._.-'-._.-'-._.-'-._.-'-._.-'-.
-# |{01:}|{06:}|{12:}|{19:}|{26:}|{32:}|{37:}| 
+# |{01:}|{06:}|{12:}|{19:}|{26:}|{32:}|{37:}|
 # '-._.-'-._.-'-._.-'-._.-'-._.-'-._.-'-._.-'
-#    |{02:}|{07:}|{13:}|{20:}|{27:}|{33:}| 
+#    |{02:}|{07:}|{13:}|{20:}|{27:}|{33:}|
 #    '-._.-'-._.-'-._.-'-._.-'-._.-'-._.-'
-#       |{03:}|{08:}|{14:}|{21:}|{28:}| 
+#       |{03:}|{08:}|{14:}|{21:}|{28:}|
 #       '-._.-'-._.-'-._.-'-._.-'-._.-'
 #          |{04:}|{09:}|{15:}|{22:}|
 #          '-._.-'-._.-'-._.-'-._.-'"""
-    else:
-        # Use the debug board template (larger, showing coordinates)
-        # 23
-        template = """# {0}
+
+# Use the debug board template (larger, showing coordinates)
+DEBUG_TEMPLATE = """# {0}
 #              ,-' `-._,-' `-._,-' `-._,-' `-.
-#             | {16:} | {23:} | {29:} | {34:} | 
+#             | {16:} | {23:} | {29:} | {34:} |
 #             |  0,-3 |  1,-3 |  2,-3 |  3,-3 |
 #          ,-' `-._,-' `-._,-' `-._,-' `-._,-' `-.
 #         | {10:} | {17:} | {24:} | {30:} | {35:} |
 #         | -1,-2 |  0,-2 |  1,-2 |  2,-2 |  3,-2 |
-#      ,-' `-._,-' `-._,-' `-._,-' `-._,-' `-._,-' `-. 
+#      ,-' `-._,-' `-._,-' `-._,-' `-._,-' `-._,-' `-.
 #     | {05:} | {11:} | {18:} | {25:} | {31:} | {36:} |
 #     | -2,-1 | -1,-1 |  0,-1 |  1,-1 |  2,-1 |  3,-1 |
 #  ,-' `-._,-' `-._,-' `-._,-' `-._,-' `-._,-' `-._,-' `-.
 # | {01:} | {06:} | {12:} | {19:} | {26:} | {32:} | {37:} |
 # | -3, 0 | -2, 0 | -1, 0 |  0, 0 |  1, 0 |  2, 0 |  3, 0 |
-#  `-._,-' `-._,-' `-._,-' `-._,-' `-._,-' `-._,-' `-._,-' 
+#  `-._,-' `-._,-' `-._,-' `-._,-' `-._,-' `-._,-' `-._,-'
 #     | {02:} | {07:} | {13:} | {20:} | {27:} | {33:} |
 #     | -3, 1 | -2, 1 | -1, 1 |  0, 1 |  1, 1 |  2, 1 |
-#      `-._,-' `-._,-' `-._,-' `-._,-' `-._,-' `-._,-' 
+#      `-._,-' `-._,-' `-._,-' `-._,-' `-._,-' `-._,-'
 #         | {03:} | {08:} | {14:} | {21:} | {28:} |
 #         | -3, 2 | -2, 2 | -1, 2 |  0, 2 |  1, 2 | key:
 #          `-._,-' `-._,-' `-._,-' `-._,-' `-._,-' ,-' `-.
@@ -75,38 +55,275 @@ def print_board(board_dict, message="", **kwargs):
 #             | -3, 3 | -2, 3 | -1, 3 |  0, 3 |   |  q, r |
 #              `-._,-' `-._,-' `-._,-' `-._,-'     `-._,-'"""
 
+# Cell coordinates inside an action line, and the move count line of a plan
+CELL_PATTERN = re.compile(r"\((\+?-?\d+), ?(\+?-?\d+)\)")
+MOVES_PATTERN = re.compile(r"#\s*(\d+) moves")
+PLACEHOLDER_PATTERN = re.compile(r"\{(\d+):\}")
+
+CELL_WIDTH = 5
+
+
+def print_board(board_dict, message="", **kwargs):
+    """
+    Helper function to print a drawing of a hexagonal board's contents.
+
+    Arguments:
+
+    * `board_dict` -- dictionary with tuples for keys and anything printable
+    for values. The tuple keys are interpreted as hexagonal coordinates (using
+    the axial coordinate system outlined in the project specification) and the
+    values are formatted as strings and placed in the drawing at the corres-
+    ponding location (only the first 5 characters of each string are used, to
+    keep the drawings small). Coordinates with missing values are left blank.
+
+    Keyword arguments:
+
+    * `message` -- an optional message to include on the first line of the
+    drawing (above the board) -- default `""` (resulting in a blank message).
+    * `debug` -- for a larger board drawing that includes the coordinates
+    inside each hex, set this to `True` -- default `False`.
+    * Or, any other keyword arguments! They will be forwarded to `print()`.
+    """
+
+    # Set up the board template:
+    template = DEBUG_TEMPLATE if DEBUG else NORMAL_TEMPLATE
+
     # prepare the provided board contents as strings, formatted to size.
-    ran = range(-3, +3+1)
-    cells = []
-    for qr in [(q, r) for q in ran for r in ran if -q-r in ran]:
-        if qr in board_dict:
-            val = board_dict[qr]
-            cell = val[0] + str(val[1]).center(5) + val[2]
-        else:
-            cell = "     "  # 5 spaces will fill a cell
-        cells.append(cell)
+    cells = [format_cell(board_dict.get(qr)) for qr in ALL_CELLS]
 
     # fill in the template to create the board drawing, then print!
     board = template.format(message, *cells)
     print(board, **kwargs)
 
 
-seq = []
-while True:
-    try:
-        l = input()
-        if l and l[0] == "#":
+def format_cell(val):
+    """
+    Format a (prefix, content, suffix) board value to fill one cell
+    """
+    if val is None:
+        return " " * CELL_WIDTH  # 5 spaces will fill a cell
+    return val[0] + str(val[1]).center(CELL_WIDTH) + val[2]
+
+
+def cell_positions(template):
+    """
+    Return the (row, column) on screen of each cell placeholder in template,
+    keyed by placeholder index
+    """
+    positions = {}
+    for row, line in enumerate(template.split("\n")):
+        # Placeholders before this one on the same line are drawn 5 wide
+        shift = 0
+        for match in PLACEHOLDER_PATTERN.finditer(line):
+            index = int(match.group(1))
+            positions[index] = (row, match.start() - shift)
+            shift += len(match.group(0)) - CELL_WIDTH
+    return positions
+
+
+class BoardRenderer:
+    """
+    Draw the board once, then redraw only the cells (and the message line)
+    that changed since the last frame.
+    """
+
+    def __init__(self, board_dict, message=""):
+        template = DEBUG_TEMPLATE if DEBUG else NORMAL_TEMPLATE
+        positions = cell_positions(template)
+
+        self.height = template.count("\n") + 1
+        self.positions = {qr: positions[index + 1]
+                                for index, qr in enumerate(ALL_CELLS)}
+        self.shown = dict(board_dict)
+
+        print_board(board_dict, message)
+
+    def update(self, board_dict, message=""):
+        # Start from the message line at the top of the drawing
+        frame = [move_up(self.height), "\r# {}\x1b[K".format(message)]
+
+        for qr, (row, column) in self.positions.items():
+            val = board_dict.get(qr)
+            if val == self.shown.get(qr):
+                continue
+            self.shown[qr] = val
+            frame.append(move_down(row) + "\r" + move_right(column) +
+                         format_cell(val) + "\r" + move_up(row))
+
+        frame.append(move_down(self.height) + "\r")
+        sys.stdout.write("".join(frame))
+        sys.stdout.flush()
+
+
+def move_up(n): return f"\x1b[{n}A" if n else ""
+
+
+def move_down(n): return f"\x1b[{n}B" if n else ""
+
+
+def move_right(n): return f"\x1b[{n}C" if n else ""
+
+# ______________________________________________________________________________
+# Plan verification
+
+
+def parse_plan(lines):
+    """
+    Parse the lines of a plan printed by search.py. Return the list of
+    (operator, src, dest, line) actions, and the move count declared by the
+    plan (None if the plan does not declare one).
+    """
+    actions = []
+    declared_moves = None
+    for line in lines:
+        line = line.strip()
+        if not line:
             continue
+        if line[0] == "#":
+            match = MOVES_PATTERN.match(line)
+            if match:
+                declared_moves = int(match.group(1))
+            continue
+
+        operator = line.split(None, 1)[0]
+        cells = [tuple(map(int, cell)) for cell in CELL_PATTERN.findall(line)]
+        if operator == EXIT and len(cells) == 1:
+            actions.append((operator, cells[0], None, line))
+        elif operator in (MOVE, JUMP) and len(cells) == 2:
+            actions.append((operator, cells[0], cells[1], line))
         else:
-            rt = re.findall(r"\((\+?-?\d+), ?(\+?-?\d+)\)", l)
-            src = tuple(map(int, rt[0]))
-            if "EXIT" in l:
-                dest = None
-            else:
-                dest = tuple(map(int, rt[1]))
-            seq.append((src, dest, l))
-    except EOFError:
-        break
+            raise ValueError("malformed action: {!r}".format(line))
+    return actions, declared_moves
+
+
+def check_action(action, pieces, blocks, exit_cells):
+    """
+    Return the reason why the action is illegal, or None if it is legal
+    """
+    operator, src, dest, _ = action
+    if src not in pieces:
+        return "no piece at {}".format(src)
+
+    if operator == EXIT:
+        if src not in exit_cells:
+            return "{} is not an exit cell".format(src)
+        return None
+
+    occupied = pieces | blocks
+    if operator == MOVE and dest not in moveable_cells(src, occupied):
+        return "cannot move from {} to {}".format(src, dest)
+    if operator == JUMP and dest not in jumpable_cells(src, occupied):
+        return "cannot jump from {} to {}".format(src, dest)
+    return None
+
+
+def apply_action(action, pieces):
+    """
+    Update the set of piece cells in place by a legal action
+    """
+    operator, src, dest, _ = action
+    pieces.remove(src)
+    if operator != EXIT:
+        pieces.add(dest)
+
+
+def new_result():
+    """
+    Return the result of a plan before it is verified
+    """
+    return {"valid": False, "legal": True, "complete": False,
+            "moves": 0, "declared_moves": None, "step": None, "error": None}
+
+
+def verify_plan(data, lines):
+    """
+    Check every action of a plan against the rules, starting from the board
+    given by data. Return a dictionary describing the outcome; the plan is
+    `valid` if every action is legal, all pieces exit, and the plan declares
+    a move count matching the number of actions.
+    """
+    result = new_result()
+
+    try:
+        actions, result["declared_moves"] = parse_plan(lines)
+    except ValueError as error:
+        result.update(legal=False, error=str(error))
+        return result
+    result["moves"] = len(actions)
+
+    pieces = {tuple(cell) for cell in data[PIECES]}
+    blocks = {tuple(cell) for cell in data[BLOCKS]}
+    exit_cells = set(EXIT_CELLS[data[COLOUR]])
+
+    for step, action in enumerate(actions, 1):
+        error = check_action(action, pieces, blocks, exit_cells)
+        if error:
+            result.update(legal=False, step=step, error=error)
+            return result
+        apply_action(action, pieces)
+
+    result["complete"] = not pieces
+    if not result["complete"]:
+        result["error"] = "{} pieces left on the board".format(len(pieces))
+    elif result["declared_moves"] is None:
+        result["error"] = "no move count declared"
+    elif result["declared_moves"] != result["moves"]:
+        result["error"] = "declared {} moves but made {}".format(
+                                result["declared_moves"], result["moves"])
+    else:
+        result["valid"] = True
+    return result
+
+
+def verify_files(pairs):
+    """
+    Verify each (input path, plan path) pair, yielding one result dictionary
+    per pair. Consecutive plans for the same input only load it once. A pair
+    that cannot be read is reported as invalid rather than ending the batch.
+    """
+    # Only the most recent input is kept, so memory does not grow with the
+    # number of boards in the batch
+    last_path, last_data = None, None
+    for pair in pairs:
+        try:
+            input_path, plan_path = pair
+            if input_path != last_path:
+                last_path = None
+                with open(input_path) as file:
+                    last_data = json.load(file)
+                last_path = input_path
+            with open(plan_path) as file:
+                result = verify_plan(last_data, file)
+        except (OSError, ValueError, KeyError) as error:
+            result = new_result()
+            result.update(legal=False, error="{}: {}".format(
+                                        type(error).__name__, error))
+            input_path, plan_path = (list(pair) + [None, None])[:2]
+        result["input"], result["plan"] = input_path, plan_path
+        yield result
+
+
+def verify_main(args):
+    """
+    Headless mode: verify the (input, plan) pairs given as arguments, or one
+    whitespace separated pair per line of stdin if there are no arguments.
+    Print one JSON result per line; exit with status 1 if any plan is invalid.
+    """
+    if args:
+        if len(args) % 2:
+            sys.exit("usage: demo.py --verify [input plan]...")
+        pairs = zip(args[::2], args[1::2])
+    else:
+        pairs = (line.split() for line in sys.stdin if line.strip())
+
+    all_valid = True
+    for result in verify_files(pairs):
+        all_valid = all_valid and result["valid"]
+        print(json.dumps(result))
+    sys.exit(0 if all_valid else 1)
+
+# ______________________________________________________________________________
+# Animation
 
 RESET = "\x1b[0m"
 BLOCK = "\x1b[7m"
@@ -117,45 +334,63 @@ COLOR = {
 }
 
 
-def move_up(n): return f"\x1b[{n}A"
-
+def animate(input_path):
+    """
+    Interactive mode: replay the plan read from stdin on the board given by
+    input_path, redrawing only the cells each action changes.
+    """
+    lines = sys.stdin.readlines()
 
-height = 23 if DEBUG else 16
+    with open(input_path) as file:
+        data = json.load(file)
 
-d = {}
+    # Only replay the actions before the first illegal one, if any. A plan
+    # that could not be parsed has no step, and nothing is replayed.
+    result = verify_plan(data, lines)
+    if result["legal"]:
+        seq, _ = parse_plan(lines)
+    elif result["step"]:
+        seq = parse_plan(lines)[0][:result["step"] - 1]
+    else:
+        seq = []
 
-with open(sys.argv[1]) as file:
-    data = json.load(file)
+    board = dict()
+    color = COLOR[data['colour']]
 
-board = dict()
-color = COLOR[data['colour']]
+    for i in data['pieces']:
+        board[tuple(i)] = (color[0], "(" + data['colour'][0] + ")", RESET)
+    for i in data['blocks']:
+        board[tuple(i)] = (BLOCK, "", RESET)
 
-for i in data['pieces']:
-    board[tuple(i)] = (color[0], "(" + data['colour'][0] + ")", RESET)
-for i in data['blocks']:
-    board[tuple(i)] = (BLOCK, "", RESET)
+    renderer = BoardRenderer(board, "Starting")
 
-print_board(board, "Starting")
+    for idx, (_, src, des, cmd) in enumerate(seq):
+        time.sleep(SPEED)
+        if des:
+            board[des] = (color[1], board[src][1], RESET)
+        board[src] = ("", board[src][1][1], "")
+        renderer.update(board, "{}/{}: {:<50}".format(
+                                        idx + 1, result["moves"], cmd))
+        if des:
+            board[des] = (color[0], board[des][1], RESET)
+        del board[src]
 
-for idx, i in enumerate(seq):
     time.sleep(SPEED)
-    sys.stdout.write(move_up(height))
-    sys.stdout.flush()
-    src, des, cmd = i
-    if des:
-        board[des] = (color[1], board[src][1], RESET)
-    board[src] = ("", board[src][1][1], "")
-    print_board(board, "{}/{}: {:<50}".format(idx + 1, len(seq), cmd))
-    if des:
-        board[des] = (color[0], board[des][1], RESET)
-    board[src] = ("", "", "")
-
-time.sleep(SPEED)
-sys.stdout.write(move_up(height))
-sys.stdout.flush()
-print_board(board, "Final board".ljust(50))
-for i in board.values():
-    if any(j in i[1] for j in ('r', 'g', 'b')):
+    renderer.update(board, "Final board".ljust(50))
+    if not result["legal"] and not result["step"]:
+        print("# " + COLOR["red"][1] + "This sequence is malformed: {}.".format(
+                                                result["error"]) + RESET)
+    elif not result["legal"]:
+        print("# " + COLOR["red"][1] + "Action {} is illegal: {}.".format(
+                                result["step"], result["error"]) + RESET)
+    elif not result["complete"]:
         print("# " + COLOR["red"][1] + "This sequence is not complete." + RESET)
-        exit()
-print("# " + COLOR["green"][1] + "This sequence is complete." + RESET)
+    else:
+        print("# " + COLOR["green"][1] + "This sequence is complete." + RESET)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == "--verify":
+        verify_main(sys.argv[2:])
+    else:
+        animate(sys.argv[1])
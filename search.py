@@ -14,8 +14,11 @@ import sys
 import json
 import time
 
-from aima_python.search import astar_search
-from chexersProblem import ChexersProblem
+from aima_python.search import (
+    astar_search, partial_expansion_astar_search, bidirectional_astar_search
+)
+from chexersProblem import ChexersProblem, ReverseChexersProblem
+from stateRanking import DenseClosedList
 
 # ______________________________________________________________________________
 
@@ -29,20 +32,43 @@ def main():
     with open(sys.argv[1]) as file:
         data = json.load(file)
 
-    # Search for the goal node
-    goal_node = astar_search(ChexersProblem(data))
+    # Search for the goal node. Pass --bidirectional to also search
+    # backwards from the goal and meet in the middle, or --partial-expansion
+    # to only generate the children needed next. Add --dense to keep the
+    # explored states in flat arrays indexed by state rank (not supported by
+    # the bidirectional search, which meets on the explored nodes).
+    if "--dense" in sys.argv[2:] and "--bidirectional" in sys.argv[2:]:
+        sys.exit("--dense cannot be combined with --bidirectional")
+    if ( "--partial-expansion" in sys.argv[2:] and
+            "--bidirectional" in sys.argv[2:] ):
+        sys.exit("--partial-expansion cannot be combined with --bidirectional")
 
-    print_actions(goal_node)
+    problem = ChexersProblem(data)
+    closed = None
+    if "--dense" in sys.argv[2:]:
+        closed = DenseClosedList(len(problem.initial))
 
-    print("# {} moves".format(len(goal_node.solution())))
+    if "--bidirectional" in sys.argv[2:]:
+        goal_node = bidirectional_astar_search(
+                    problem, ReverseChexersProblem(data, verbose=False))
+    elif "--partial-expansion" in sys.argv[2:]:
+        goal_node = partial_expansion_astar_search(problem, closed)
+    else:
+        goal_node = astar_search(problem, closed=closed)
 
+    actions = problem.solution(goal_node)
 
-def print_actions(goal_node):
+    print_actions(actions)
+
+    print("# {} moves".format(len(actions)))
+
+
+def print_actions(actions):
     """
     Print the actions taken to reach the goal node in the specified format
     """
 
-    for action in goal_node.solution():
+    for action in actions:
         operator = action[0]
         if operator == EXIT:
             curr_cell = action[1]
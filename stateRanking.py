@@ -0,0 +1,119 @@
+from array import array
+
+from aima_python.node import Node
+from aima_python.search import follow_states
+from utils import ALL_CELLS, CELL_INDEX
+
+# ______________________________________________________________________________
+# A state with p pieces is a p-combination of the cells on the board, so the
+# states with p pieces can be numbered 0 .. C(37, p) - 1 by the combinatorial
+# number system. The ranks of states with fewer pieces come first, which keeps
+# every state with at most p pieces within 0 .. STATE_OFFSETS[p + 1] - 1.
+
+N_CELLS = len(ALL_CELLS)
+
+
+def binomials(n):
+    """
+    Pascal's triangle, such that binomials(n)[i][k] is C(i, k) for i <= n
+    """
+    table = [[1] + [0] * n for _ in range(n + 1)]
+    for i in range(1, n + 1):
+        for k in range(1, i + 1):
+            table[i][k] = table[i - 1][k - 1] + table[i - 1][k]
+    return table
+
+
+BINOMIALS = binomials(N_CELLS)
+
+# The rank of the first state with p pieces
+STATE_OFFSETS = [sum(BINOMIALS[N_CELLS][k] for k in range(p))
+                        for p in range(N_CELLS + 2)]
+
+
+def count_states(n_pieces):
+    """
+    Number of states with at most n_pieces pieces
+    """
+    return STATE_OFFSETS[n_pieces + 1]
+
+
+def rank_state(state):
+    """
+    Map a state to its rank, a distinct integer below
+    count_states(len(state))
+    """
+    # ALL_CELLS is in the same order as sorted tuples, so the pieces of a
+    # state always have increasing cell indices
+    rank = STATE_OFFSETS[len(state)]
+    for k, cell in enumerate(state, 1):
+        rank += BINOMIALS[CELL_INDEX[cell]][k]
+    return rank
+
+
+def unrank_state(rank):
+    """
+    Map a rank back to its state
+    """
+    n_pieces = 0
+    while STATE_OFFSETS[n_pieces + 1] <= rank:
+        n_pieces += 1
+    rank -= STATE_OFFSETS[n_pieces]
+
+    # Take the largest cell index with C(index, k) <= rank for each piece,
+    # from the last piece to the first
+    cells = []
+    index = N_CELLS
+    for k in range(n_pieces, 0, -1):
+        index -= 1
+        while BINOMIALS[index][k] > rank:
+            index -= 1
+        rank -= BINOMIALS[index][k]
+        cells.append(ALL_CELLS[index])
+    return tuple(reversed(cells))
+
+# ______________________________________________________________________________
+
+class DenseClosedList:
+    """
+    A closed list for best_first_graph_search holding the best path cost and
+    the parent of every state with at most n_pieces pieces in flat arrays
+    indexed by rank_state, i.e. 6 bytes per possible state instead of a dict
+    entry and a Node per reached state.
+    Nodes are unlinked from their parents once added, so only the nodes in
+    the frontier are kept alive. The path to the goal is rebuilt from the
+    parent ranks.
+    """
+
+    # Path cost of the states not reached yet, and parent of the initial state
+    UNREACHED = 0xFFFF
+    NO_PARENT = 0xFFFFFFFF
+
+    def __init__(self, n_pieces):
+        size = count_states(n_pieces)
+        self.path_costs = array('H', [DenseClosedList.UNREACHED]) * size
+        self.parents = array('I', [DenseClosedList.NO_PARENT]) * size
+
+    def path_cost(self, state):
+        path_cost = self.path_costs[rank_state(state)]
+        return None if path_cost == DenseClosedList.UNREACHED else path_cost
+
+    def add(self, node):
+        rank = rank_state(node.state)
+        self.path_costs[rank] = node.path_cost
+        if node.parent:
+            self.parents[rank] = rank_state(node.parent.state)
+            node.parent = None
+
+    def goal_node(self, problem, node):
+        """
+        Rebuild the path from the initial state to the goal node by following
+        the parent ranks
+        """
+        states = []
+        rank = rank_state(node.state)
+        while self.parents[rank] != DenseClosedList.NO_PARENT:
+            states.append(unrank_state(rank))
+            rank = self.parents[rank]
+
+        return follow_states(problem, Node(problem.initial), reversed(states))
@@ -5,6 +5,7 @@ BLOCKS = "blocks"
 MOVE = "MOVE"
 JUMP = "JUMP"
 EXIT = "EXIT"
+ENTER = "ENTER"
 
 # The minimum and maximum coordinates on the q and r axes
 MIN_COORDINATE = -3
@@ -26,6 +27,9 @@ def all_cells():
 
 ALL_CELLS = all_cells()
 
+# The position of each cell in ALL_CELLS
+CELL_INDEX = {cell: index for index, cell in enumerate(ALL_CELLS)}
+
 
 def generate_cells(cell, delta_pairs):
     """